@@ -1,23 +1,126 @@
 import numpy as np
 import pandas as pd
-import copy
+from pandas.api.types import CategoricalDtype
 pd.options.mode.chained_assignment = None
 import matplotlib.pyplot as plt
 import seaborn as sns
 from category_encoders import CatBoostEncoder
-from scipy.spatial.distance import jensenshannon
-from scipy.stats import gaussian_kde
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy import sparse
+from scipy.ndimage import gaussian_filter1d
 from sklearn.model_selection import RandomizedSearchCV, train_test_split
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+try:
+    from sklearn.ensemble import (HistGradientBoostingRegressor,
+                                  HistGradientBoostingClassifier)
+except ImportError:
+    # scikit-learn < 1.0
+    from sklearn.experimental import enable_hist_gradient_boosting  # noqa
+    from sklearn.ensemble import (HistGradientBoostingRegressor,
+                                  HistGradientBoostingClassifier)
+from sklearn.preprocessing import OneHotEncoder
 from sklearn.metrics import (r2_score, mean_absolute_error, precision_score,
-                             recall_score, accuracy_score, f1_score,
-                             roc_auc_score)
+                             recall_score, f1_score, roc_auc_score)
 from sklearn.utils import shuffle
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 import logging
 logger = logging.getLogger(__name__)
 
 
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _column_stats(X):
+        """Computes the min, max, count & std of each column of X
+
+        Columns are scanned in parallel in a single pass, with the std
+        accumulated with Welford's algorithm. NaN values are ignored.
+        """
+        n_rows, n_cols = X.shape
+        mins = np.empty(n_cols)
+        maxs = np.empty(n_cols)
+        counts = np.zeros(n_cols)
+        stds = np.empty(n_cols)
+        for j in prange(n_cols):
+            min_ = np.inf
+            max_ = -np.inf
+            n = 0
+            mean = 0.0
+            m2 = 0.0
+            for i in range(n_rows):
+                v = np.float64(X[i, j])
+                if np.isnan(v):
+                    continue
+                min_ = min(min_, v)
+                max_ = max(max_, v)
+                n += 1
+                delta = v - mean
+                mean += delta / n
+                m2 += delta * (v - mean)
+            mins[j] = min_
+            maxs[j] = max_
+            counts[j] = n
+            stds[j] = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+        return mins, maxs, counts, stds
+
+    @njit(parallel=True, cache=True)
+    def _column_histograms(X, mins, maxs, bins):
+        """Bins each column of X into `bins` bins over [mins, maxs]
+
+        Columns are binned in parallel. `mins` and `maxs` are expected to be
+        the column extremes, so values are clamped into the outer bins to
+        absorb rounding. NaN values are ignored.
+        """
+        n_rows, n_cols = X.shape
+        hist = np.zeros((n_cols, bins))
+        for j in prange(n_cols):
+            width = maxs[j] - mins[j]
+            if width == 0:
+                continue
+            scale = bins / width
+            for i in range(n_rows):
+                v = (X[i, j] - mins[j]) * scale
+                if not np.isnan(v):
+                    hist[j, min(max(int(v), 0), bins - 1)] += 1
+        return hist
+
+else:
+    def _column_stats(X):
+        """Computes the min, max, count & std of each column of X
+
+        NumPy fallback used when numba is not installed.
+        """
+        return (np.nanmin(X, axis=0).astype(np.float64),
+                np.nanmax(X, axis=0).astype(np.float64),
+                np.sum(~np.isnan(X), axis=0).astype(np.float64),
+                np.nanstd(X, axis=0, ddof=1, dtype=np.float64))
+
+    def _column_histograms(X, mins, maxs, bins):
+        """Bins each column of X into `bins` bins over [mins, maxs]
+
+        NumPy fallback used when numba is not installed.
+        """
+        hist = np.zeros((X.shape[1], bins))
+        for j in range(X.shape[1]):
+            if maxs[j] == mins[j]:
+                continue
+            col = X[:, j]
+            hist[j], _ = np.histogram(col[~np.isnan(col)], bins=bins,
+                                      range=(mins[j], maxs[j]))
+        return hist
+
+
+def _catboost_encode(X_train, y_train, X_test, y_test, random_state):
+    """Fits a CatBoostEncoder on the train data and encodes train & test"""
+    tf = CatBoostEncoder(cols=list(X_train.columns), random_state=random_state)
+    return (tf.fit_transform(X_train, y_train),
+            tf.transform(X_test, y_test))
+
+
 class DataDriftDetector:
     """Compare differences between 2 datasets
 
@@ -80,8 +183,8 @@ class DataDriftDetector:
         assert isinstance(numeric_columns, (list, type(None))),\
             "numeric_columns should be of type list"
 
-        df_prior_ = copy.deepcopy(df_prior)
-        df_post_ = copy.deepcopy(df_post)
+        df_prior_ = df_prior.copy()
+        df_post_ = df_post.copy()
 
         if categorical_columns is None:
             categorical_columns = (
@@ -93,12 +196,16 @@ class DataDriftDetector:
                 categorical_columns
             )
 
-        df_prior_[categorical_columns] = (
-            df_prior_[categorical_columns].astype(str)
-        )
-        df_post_[categorical_columns] = (
-            df_post_[categorical_columns].astype(str)
-        )
+        # cast to str first to normalise mixed types, then to a category
+        # dtype shared between both datasets so that codes line up
+        for col in categorical_columns:
+            col_prior = df_prior_[col].astype(str)
+            col_post = df_post_[col].astype(str)
+            dtype = CategoricalDtype(
+                categories=pd.Index(pd.concat([col_prior, col_post]).unique())
+            )
+            df_prior_[col] = col_prior.astype(dtype)
+            df_post_[col] = col_post.astype(dtype)
 
         if numeric_columns is None:
             num_types = ['float64','float32','int32','int64','uint8']
@@ -117,8 +224,44 @@ class DataDriftDetector:
         self.df_prior = df_prior_
         self.df_post = df_post_
 
+        # count of each category in df_prior & df_post, both datasets share
+        # the same category dtype so the codes can be counted directly
+        self._cat_counts = {}
+        for col in categorical_columns:
+            n_categories = len(df_prior_[col].cat.categories)
+            self._cat_counts[col] = (
+                np.bincount(df_prior_[col].cat.codes,
+                            minlength=n_categories).astype(np.float64),
+                np.bincount(df_post_[col].cat.codes,
+                            minlength=n_categories).astype(np.float64)
+            )
+
+        # number of unique labels of each categorical column in df_prior
+        self._nunique = {col: np.count_nonzero(self._cat_counts[col][0])
+                         for col in categorical_columns}
 
-    def calculate_drift(self):
+        # numeric columns cached as column-contiguous float32 arrays, shifted
+        # by the float64 minimum of each column so that columns with a large
+        # offset (e.g. timestamps) keep their resolution in float32
+        num_prior = df_prior_[numeric_columns].to_numpy(dtype=np.float64)
+        num_post = df_post_[numeric_columns].to_numpy(dtype=np.float64)
+
+        num_mins = [np.nanmin(num, axis=0) for num in (num_prior, num_post)
+                    if len(num) > 0]
+        if len(num_mins) > 0:
+            self._num_offset = np.nan_to_num(np.fmin.reduce(num_mins))
+        else:
+            self._num_offset = np.zeros(len(numeric_columns))
+        self._num_prior = np.asfortranarray(
+            num_prior - self._num_offset, dtype=np.float32
+        )
+        self._num_post = np.asfortranarray(
+            num_post - self._num_offset, dtype=np.float32
+        )
+        self._binned = None
+
+
+    def calculate_drift(self, metric='jensenshannon'):
         """Calculates the jensen shannon distance between the 2 datasets
 
         For categorical columns, the probability of each category will be
@@ -128,62 +271,61 @@ class DataDriftDetector:
         separately for `df_prior` and `df_post`, and a probability array
         will be sampled from them and compared with the jensen shannon distance
 
+        Args
+        ----
+        metric: <str>
+            Distance metric to use, either 'jensenshannon' or 'triangular'.
+            The triangular distance ranks columns similarly to the jensen
+            shannon distance without computing any logarithms, and is cheaper
+            when only the relative drift between columns matters
+
         Returns
         ----
         Sorted list of tuples containing the column name followed by the
-        computed jensen shannon distance
+        computed distance
         """
+        assert metric in ('jensenshannon', 'triangular'),\
+            "metric should be either 'jensenshannon' or 'triangular'"
+
+        if metric == 'triangular':
+            distance = self._triangular
+        else:
+            distance = self._jsd
+
         cat_res = {}
         num_res = {}
         STEPS = 100
 
         for col in self.categorical_columns:
-            # to ensure similar order, concat before computing probability
-            col_prior = self.df_prior[col].to_frame()
-            col_post = self.df_post[col].to_frame()
-            col_prior['_source'] = 'prior'
-            col_post['_source'] = 'post'
-
-            col_ = pd.concat([col_prior, col_post], ignore_index=True)
-
-            # aggregate and convert to probability array
-            arr = (col_.groupby([col, '_source'])
-                       .size()
-                       .to_frame()
-                       .reset_index()
-                       .pivot(index=col, columns='_source')
-                       .droplevel(0, axis=1)
-                  )
-            arr_ = arr.div(arr.sum(axis=0),axis=1)
-            arr_.fillna(0, inplace=True)
+            # convert category counts to probability arrays
+            counts_prior, counts_post = self._cat_counts[col]
+            arr_prior = counts_prior / counts_prior.sum()
+            arr_post = counts_post / counts_post.sum()
 
             # calculate distance
-            d = jensenshannon(arr_['prior'].to_numpy(),
-                              arr_['post'].to_numpy())
+            d = distance(arr_prior, arr_post)
 
             cat_res.update({col: d})
 
-        for col in self.numeric_columns:
-            # fit gaussian_kde
-            col_prior = self.df_prior[col]
-            col_post = self.df_post[col]
-            kde_prior = gaussian_kde(col_prior)
-            kde_post = gaussian_kde(col_post)
+        if len(self.numeric_columns) > 0:
+            (mins, maxs, hist_prior, hist_post,
+             bw_prior, bw_post) = self._prebin()
 
+        for j, col in enumerate(self.numeric_columns):
             # get range of values
-            min_ = min(col_prior.min(), col_post.min())
-            max_ = max(col_prior.max(), col_post.max())
-            range_ = np.linspace(start=min_, stop=max_, num=STEPS)
+            range_ = np.linspace(start=mins[j], stop=maxs[j], num=STEPS)
 
-            # sample range from KDE
-            arr_prior_ = kde_prior(range_)
-            arr_post_ = kde_post(range_)
+            # sample range from binned KDE
+            arr_prior_ = self._kde(hist_prior[j], bw_prior[j],
+                                   mins[j], maxs[j], range_)
+            arr_post_ = self._kde(hist_post[j], bw_post[j],
+                                  mins[j], maxs[j], range_)
 
             arr_prior = arr_prior_ / np.sum(arr_prior_)
             arr_post = arr_post_ / np.sum(arr_post_)
 
             # calculate js d
-            d = jensenshannon(arr_prior, arr_post)
+            d = distance(arr_prior, arr_post)
 
             num_res.update({col: d})
 
@@ -195,6 +337,100 @@ class DataDriftDetector:
         return {'categorical': cat_res, 'numerical': num_res}
 
 
+    def _jsd(self, p, q):
+        """Calculates the jensen shannon distance between 2 probability arrays
+
+        Zero probabilities are masked with np.where rather than branched on,
+        so the whole computation stays in vectorised NumPy ufuncs. The
+        divergence is clipped at 0 before the square root, so rounding errors
+        cannot yield NaN.
+        """
+        m = 0.5 * (p + q)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            kl_p = np.where(p > 0, p * np.log(p / m), 0.0).sum()
+            kl_q = np.where(q > 0, q * np.log(q / m), 0.0).sum()
+
+        js = 0.5 * (kl_p + kl_q)
+        return np.sqrt(max(js, 0.0))
+
+
+    def _triangular(self, p, q):
+        """Calculates the triangular distance between 2 probability arrays
+
+        sqrt(0.5 * sum((p - q)^2 / (p + q))), a log-free proxy for the
+        jensen shannon distance.
+        """
+        sum_ = p + q
+        return np.sqrt(
+            0.5 * np.sum((p - q) ** 2 / np.where(sum_ > 0, sum_, 1.0))
+        )
+
+
+    def _prebin(self, bins=1024):
+        """Bins all numeric columns of both datasets over a shared range
+
+        Each dataset is scanned twice, once for the per column statistics
+        and once for the histograms, after which the results are cached so
+        that the raw data is not touched again.
+
+        Returns
+        ----
+        Tuple of the per column mins & maxs, the prior & post histograms
+        and the prior & post Scott's rule KDE bandwidths
+        """
+        if self._binned is None:
+            min_prior, max_prior, n_prior, std_prior = (
+                _column_stats(self._num_prior)
+            )
+            min_post, max_post, n_post, std_post = (
+                _column_stats(self._num_post)
+            )
+
+            # the cached arrays are shifted by `_num_offset`, so bin over the
+            # shifted range and add the offset back for the returned range
+            mins = np.minimum(min_prior, min_post)
+            maxs = np.maximum(max_prior, max_post)
+
+            self._binned = (
+                mins + self._num_offset,
+                maxs + self._num_offset,
+                _column_histograms(self._num_prior, mins, maxs, bins),
+                _column_histograms(self._num_post, mins, maxs, bins),
+                std_prior * n_prior ** (-1. / 5),
+                std_post * n_post ** (-1. / 5)
+            )
+
+        return self._binned
+
+
+    def _kde(self, hist, bw, min_, max_, range_):
+        """Approximates a gaussian KDE sampled at `range_` from a histogram
+
+        `hist` is a fine histogram of the values over [min_, max_], which is
+        smoothed with a gaussian filter of bandwidth `bw`. This is
+        O(n + bins) instead of the O(n * len(range_)) of evaluating a
+        gaussian_kde directly.
+
+        The bandwidth is floored at one bin, as the histogram cannot resolve
+        anything narrower. This also covers a column that is constant in
+        one dataset (bw of 0, or NaN for a single value), which is treated
+        as a point mass instead of yielding NaN.
+        """
+        width = max_ - min_
+        if width == 0:
+            return np.ones(len(range_))
+
+        bins = len(hist)
+        sigma = bw * bins / width
+        if not np.isfinite(sigma) or sigma < 1:
+            sigma = 1.0
+        kde = gaussian_filter1d(hist, sigma=sigma, mode='constant')
+
+        edges = np.linspace(min_, max_, bins + 1)
+        centers = (edges[:-1] + edges[1:]) / 2
+        return np.interp(range_, centers, kde)
+
+
     def plot_categorical_to_numeric(self,
                                     plot_categorical_columns=None,
                                     plot_numeric_columns=None,
@@ -237,12 +473,10 @@ class DataDriftDetector:
         df_prior = self.df_prior.copy()
         df_post = self.df_post.copy()
 
-        col_nunique = df_prior.nunique()
-
         if plot_categorical_columns is None:
             plot_categorical_columns = (
-                [col for col in col_nunique.index if
-                 (col_nunique[col] <= 20) & (col in self.categorical_columns)]
+                [col for col in self.categorical_columns if
+                 self._nunique[col] <= 20]
             )
 
         if plot_numeric_columns is None:
@@ -353,11 +587,10 @@ class DataDriftDetector:
         assert isinstance(plot_categorical_columns, (list, type(None))),\
             "plot_categorical_columns should be of type list"
 
-        col_nunique = self.df_prior.nunique()
         if plot_categorical_columns is None:
             plot_categorical_columns = (
-                [col for col in col_nunique.index if
-                 (col_nunique[col] <= 20) & (col in self.categorical_columns)]
+                [col for col in self.categorical_columns if
+                 self._nunique[col] <= 20]
             )
 
         logger.info(
@@ -377,21 +610,21 @@ class DataDriftDetector:
                 _ax0 = ax[i, 0]
                 _ax1 = ax[i, 1]
 
-            (self.df_prior[col].value_counts(normalize=True)
-                               .rename("Proportion")
-                               .sort_index()
-                               .reset_index()
-                               .pipe((sns.barplot, "data"),
-                                     x="index", y="Proportion", ax=_ax0))
+            # both datasets share the same categories, so plot the category
+            # counts against the same sorted labels
+            categories = self.df_prior[col].cat.categories
+            order = categories.argsort()
+            labels = categories[order]
+
+            counts_prior, counts_post = self._cat_counts[col]
+            prop_prior = counts_prior[order] / len(self.df_prior)
+            prop_post = counts_post[order] / len(self.df_post)
+
+            sns.barplot(x=labels, y=prop_prior, ax=_ax0)
             _ax0.set_title(col + ", prior")
-            _ax0.set(xlabel=col)
-            (self.df_post[col].value_counts(normalize=True)
-                              .rename("Proportion")
-                              .sort_index()
-                              .reset_index()
-                              .pipe((sns.barplot, "data"),
-                                    x="index", y="Proportion", ax=_ax1))
-            _ax1.set(xlabel=col)
+            _ax0.set(xlabel=col, ylabel="Proportion")
+            sns.barplot(x=labels, y=prop_post, ax=_ax1)
+            _ax1.set(xlabel=col, ylabel="Proportion")
             _ax1.set_title(col + ", post")
 
         plt.close(fig)
@@ -400,7 +633,8 @@ class DataDriftDetector:
 
 
     def _rmse(self, targets, predictions):
-        return np.sqrt(np.mean((predictions-targets)**2))
+        d = np.asarray(predictions, dtype=np.float64) - np.asarray(targets)
+        return np.sqrt(np.dot(d, d) / d.size)
 
 
     def compare_ml_efficacy(self,
@@ -413,9 +647,9 @@ class DataDriftDetector:
                             train_size=0.7,
                             cv=3,
                             n_iter=5,
-                            param_grid={'n_estimators': [100, 200],
-                                        'max_samples': [0.6, 0.8, 1],
-                                        'max_depth': [3, 4, 5]}):
+                            param_grid=None,
+                            model='rf',
+                            n_jobs=-1):
         """Compares the ML efficacy of the prior data to the post data
 
         For a given `target_column`, this builds a ML model separately with
@@ -459,7 +693,17 @@ class DataDriftDetector:
 
         param_grid: <dictionary of parameters>
             Dictionary of hyperparameter values to be iterated by
-            the RandomizedSearchCV
+            the RandomizedSearchCV, uses a default grid for `model` if not
+            provided
+
+        model: <str>
+            Model to be built, one of 'rf' (scikit-learn random forest),
+            'hgb' (scikit-learn histogram gradient boosting, much faster to
+            train on large datasets) or 'cuml' (GPU random forest, requires
+            cuml to be installed)
+
+        n_jobs: <int>
+            Number of cores used to fit the models, -1 uses all cores
 
         Returns
         ----
@@ -476,10 +720,20 @@ class DataDriftDetector:
             "OHE_columns should be of type list"
         assert isinstance(high_cardinality_columns, (list, type(None))),\
             "high_cardinality_columns should be of type list"
+        assert model in ('rf', 'hgb', 'cuml'),\
+            "model should be one of 'rf', 'hgb' or 'cuml'"
+
 
+        # TODO: - Allow choice of encoding for high cardinality cols?
 
-        # TODO: - Allow choice of model?
-        #       - Allow choice of encoding for high cardinality cols?
+        if param_grid is None:
+            if model == 'hgb':
+                param_grid = {'learning_rate': [0.05, 0.1, 0.2],
+                              'max_leaf_nodes': [15, 31, 63]}
+            else:
+                param_grid = {'n_estimators': [100, 200],
+                              'max_samples': [0.6, 0.8, 1.0],
+                              'max_depth': [3, 4, 5]}
 
         self.target_column = target_column
         self.train_size = train_size
@@ -487,25 +741,25 @@ class DataDriftDetector:
         self.cv = cv
         self.n_iter = n_iter
         self.param_grid = param_grid
-
-        col_nunique = self.df_prior.nunique()
+        self.model = model
+        self.n_jobs = n_jobs
 
         if OHE_columns is None:
-            OHE_columns = [col for col in col_nunique.index if
-                        (col_nunique[col] <= OHE_columns_cutoff) &
-                        (col in self.categorical_columns)]
+            OHE_columns = [col for col in self.categorical_columns if
+                           self._nunique[col] <= OHE_columns_cutoff]
 
         if high_cardinality_columns is None:
-            high_cardinality_columns = [col for col in col_nunique.index if
-                                     (col_nunique[col] > OHE_columns_cutoff) &
-                                     (col in self.categorical_columns)]
+            high_cardinality_columns = [col for col in self.categorical_columns
+                                        if self._nunique[col] >
+                                        OHE_columns_cutoff]
 
         self.OHE_columns = OHE_columns
         self.high_cardinality_columns = high_cardinality_columns
 
-        test_data_ = copy.deepcopy(test_data)
+        test_data_ = test_data
 
         if test_data_ is not None:
+            test_data_ = test_data_.copy()
             test_data_[self.numeric_columns] = (
                 test_data_[self.numeric_columns].astype(float)
             )
@@ -532,11 +786,13 @@ class DataDriftDetector:
         """Prepares datasets for ML
 
         This does one hot encoding, cat boost encoding, and train test
-        split (if necessary).
+        split (if necessary). Feature matrices are sparse when there are
+        one hot encoded columns. The datasets themselves are not modified,
+        so they do not need to be copied.
         """
 
-        df_post = copy.deepcopy(self.df_post)
-        train_prior = copy.deepcopy(self.df_prior)
+        df_post = self.df_post
+        train_prior = self.df_prior
 
         # create test data if not provided
         if self.test_data is None:
@@ -554,7 +810,7 @@ class DataDriftDetector:
             test = df_post.iloc[n_split:]
 
         else:
-            test = copy.deepcopy(self.test_data)
+            test = self.test_data
             train_post = df_post
 
         # determine columns for OHE & CatBoost
@@ -568,52 +824,46 @@ class DataDriftDetector:
         if len(high_cardinality_columns) > 0:
             logger.info("Cat boost encoded columns: ", high_cardinality_columns)
 
-        # concat and then OHE to ensure columns match
-        train_prior['source'] = "Train Prior"
-        test['source'] = "Test"
-        train_post['source'] = "Train Post"
-
-        df = pd.concat([train_prior, test, train_post])
-        df = pd.get_dummies(data=df, columns=OHE_columns)
-
-        train_prior = df[df.source == 'Train Prior'].drop('source', axis=1)
-        test = df[df.source == 'Test'].drop('source', axis=1)
-        train_post = df[df.source == 'Train Post'].drop('source', axis=1)
-
-        # CatBoostEncoder for high cardinality columns
-        test_prior = copy.deepcopy(test)
-        test_post = copy.deepcopy(test)
+        # OHE with the labels shared by df_prior & df_post to ensure
+        # columns match, ignoring labels only seen in the test data
+        if len(OHE_columns) > 0:
+            ohe = OneHotEncoder(
+                categories=[self._ohe_categories(col) for col in OHE_columns],
+                handle_unknown='ignore',
+                dtype=np.float32
+            )
+            ohe.fit(train_prior[OHE_columns])
+        else:
+            ohe = None
 
-        tf_prior = CatBoostEncoder(cols=high_cardinality_columns,
-                                   random_state=self.random_state)
-        tf_post = CatBoostEncoder(cols=high_cardinality_columns,
-                                  random_state=self.random_state)
+        # CatBoostEncoder for high cardinality columns, the prior and post
+        # encoders are independent so they are fitted concurrently
+        enc_prior = enc_post = (None, None)
 
-        train_prior[high_cardinality_columns] = (
-            tf_prior.fit_transform(train_prior[high_cardinality_columns],
-                                   train_prior[self.target_column])
-        )
-        test_prior[high_cardinality_columns] = (
-            tf_prior.transform(test_prior[high_cardinality_columns],
-                               test_prior[self.target_column])
-        )
-        train_post[high_cardinality_columns] = (
-            tf_post.fit_transform(train_post[high_cardinality_columns],
-                                  train_post[self.target_column])
-        )
-        test_post[high_cardinality_columns] = (
-            tf_post.transform(test_post[high_cardinality_columns],
-                              test_post[self.target_column])
-        )
+        if len(high_cardinality_columns) > 0:
+            enc_prior, enc_post = Parallel(
+                n_jobs=min(2, effective_n_jobs(self.n_jobs))
+            )(
+                delayed(_catboost_encode)(train[high_cardinality_columns],
+                                          train[self.target_column],
+                                          test[high_cardinality_columns],
+                                          test[self.target_column],
+                                          self.random_state)
+                for train in [train_prior, train_post]
+            )
 
-        X_train_prior = train_prior.drop(self.target_column, axis=1).astype(float)
+        X_train_prior = self._encode_features(train_prior, ohe, OHE_columns,
+                                              enc_prior[0])
         y_train_prior = train_prior[self.target_column].astype(float)
-        X_test_prior = test_prior.drop(self.target_column, axis=1).astype(float)
+        X_test_prior = self._encode_features(test, ohe, OHE_columns,
+                                             enc_prior[1])
         y_test = test[self.target_column].astype(float)
 
-        X_train_post = train_post.drop(self.target_column, axis=1).astype(float)
+        X_train_post = self._encode_features(train_post, ohe, OHE_columns,
+                                             enc_post[0])
         y_train_post = train_post[self.target_column].astype(float)
-        X_test_post = test_post.drop(self.target_column, axis=1).astype(float)
+        X_test_post = self._encode_features(test, ohe, OHE_columns,
+                                            enc_post[1])
 
         self.X_train_prior = X_train_prior
         self.y_train_prior = y_train_prior
@@ -624,30 +874,129 @@ class DataDriftDetector:
         self.X_test_post = X_test_post
 
 
-    def _build_regressor(self):
+    def _ohe_categories(self, col):
+        """Labels of `col` across df_prior & df_post, for one hot encoding
+
+        Category columns already share their categories between both
+        datasets, other columns (e.g. numeric) use their sorted unique
+        values.
         """
-        Builds a random forest regressor with a RandomizedSearchCV
+        if isinstance(self.df_prior[col].dtype, CategoricalDtype):
+            return list(self.df_prior[col].cat.categories)
+
+        values = pd.concat([self.df_prior[col], self.df_post[col]])
+        return list(np.sort(values.dropna().unique()))
+
+
+    def _encode_features(self, df, ohe, OHE_columns, encoded=None):
+        """Builds the feature matrix of `df` for ML
+
+        All columns other than the target are cast to float32, with
+        `OHE_columns` one hot encoded by `ohe` and the columns of `encoded`
+        (cat boost encoded values) replacing those of `df`. The result is a
+        sparse matrix for random forests, and dense for models which do not
+        accept sparse input.
         """
+        X = df.drop([self.target_column] + OHE_columns, axis=1)
 
-        model_prior_ = RandomForestRegressor(random_state=self.random_state)
-        model_post_ = RandomForestRegressor(random_state=self.random_state)
+        if encoded is not None:
+            X[encoded.columns] = encoded
+
+        X = X.astype(np.float32)
+
+        if ohe is None:
+            return X
+
+        X_ohe = ohe.transform(df[OHE_columns])
+
+        if self.model != 'rf':
+            return np.hstack([X.to_numpy(), X_ohe.toarray()])
+
+        return sparse.hstack([sparse.csr_matrix(X.to_numpy()), X_ohe],
+                             format='csr')
+
+
+    def _make_estimator(self, regressor):
+        """Creates an unfitted estimator for the chosen `model`"""
+
+        if self.model == 'hgb':
+            if regressor:
+                Model = HistGradientBoostingRegressor
+            else:
+                Model = HistGradientBoostingClassifier
+            return Model(max_iter=200,
+                         max_depth=5,
+                         early_stopping=True,
+                         random_state=self.random_state)
+
+        if self.model == 'cuml':
+            try:
+                from cuml.ensemble import (RandomForestRegressor as
+                                           cuRandomForestRegressor,
+                                           RandomForestClassifier as
+                                           cuRandomForestClassifier)
+            except ImportError:
+                raise ImportError("cuml needs to be installed to use "
+                                  "model='cuml'")
+            if regressor:
+                return cuRandomForestRegressor(random_state=self.random_state)
+            return cuRandomForestClassifier(random_state=self.random_state)
+
+        if regressor:
+            return RandomForestRegressor(random_state=self.random_state,
+                                         n_jobs=self.n_jobs)
+        return RandomForestClassifier(random_state=self.random_state,
+                                      n_jobs=self.n_jobs)
+
+
+    def _fit_models(self, model_prior_, model_post_):
+        """Fits a RandomizedSearchCV for the prior and post models
+
+        The 2 searches are independent, so they are fitted concurrently,
+        each with half of the `n_jobs` cores for its cross validation.
+        Estimators fitted within the searches are limited by joblib's
+        nested parallelism handling, so the total does not exceed `n_jobs`.
+        """
+        n_cores = effective_n_jobs(self.n_jobs)
+        n_outer = min(2, n_cores)
+        n_jobs = max(1, n_cores // n_outer)
 
         model_prior = RandomizedSearchCV(model_prior_,
                                          self.param_grid,
                                          n_iter=self.n_iter,
                                          cv=self.cv,
-                                         random_state=self.random_state)
+                                         random_state=self.random_state,
+                                         n_jobs=n_jobs)
         model_post = RandomizedSearchCV(model_post_,
                                         self.param_grid,
                                         n_iter=self.n_iter,
                                         cv=self.cv,
-                                        random_state=self.random_state)
+                                        random_state=self.random_state,
+                                        n_jobs=n_jobs)
+
+        model_prior, model_post = Parallel(n_jobs=n_outer)(
+            delayed(model.fit)(X, y) for model, X, y in [
+                (model_prior, self.X_train_prior, self.y_train_prior),
+                (model_post, self.X_train_post, self.y_train_post)
+            ]
+        )
+
+        return model_prior, model_post
+
+
+    def _build_regressor(self):
+        """
+        Builds a regressor with a RandomizedSearchCV
+        """
+
+        model_prior_ = self._make_estimator(regressor=True)
+        model_post_ = self._make_estimator(regressor=True)
 
-        model_prior.fit(self.X_train_prior, self.y_train_prior)
-        model_post.fit(self.X_train_post, self.y_train_post)
+        model_prior, model_post = self._fit_models(model_prior_, model_post_)
 
         logger.info(
-            "A RandomForestRegressor with a RandomizedSearchCV was trained.",
+            "A {} with a RandomizedSearchCV was trained."
+            .format(type(model_prior_).__name__),
             "The final model (trained with prior data) parameters are:",
             model_prior.best_estimator_,
             "The final model (trained with post data) parameters are:",
@@ -660,28 +1009,17 @@ class DataDriftDetector:
 
     def _build_classifier(self):
         """
-        Build a random forest classifier with a RandomizedSearchCV
+        Build a classifier with a RandomizedSearchCV
         """
 
-        model_prior_ = RandomForestClassifier(random_state=self.random_state)
-        model_post_ = RandomForestClassifier(random_state=self.random_state)
+        model_prior_ = self._make_estimator(regressor=False)
+        model_post_ = self._make_estimator(regressor=False)
 
-        model_prior = RandomizedSearchCV(model_prior_,
-                                        self.param_grid,
-                                        n_iter=self.n_iter,
-                                        cv=self.cv,
-                                        random_state=self.random_state)
-        model_post = RandomizedSearchCV(model_post_,
-                                         self.param_grid,
-                                         n_iter=self.n_iter,
-                                         cv=self.cv,
-                                         random_state=self.random_state)
-
-        model_prior.fit(self.X_train_prior, self.y_train_prior)
-        model_post.fit(self.X_train_post, self.y_train_post)
+        model_prior, model_post = self._fit_models(model_prior_, model_post_)
 
         logger.info(
-            "A RandomForestClassifier with a RandomizedSearchCV was trained.",
+            "A {} with a RandomizedSearchCV was trained."
+            .format(type(model_prior_).__name__),
             "The final model (trained with prior data) parameters are:",
             model_prior.best_estimator_,
             "The final model (trained with post data) parameters are:",
@@ -729,74 +1067,87 @@ class DataDriftDetector:
         Returns a pandas dataframe of the result.
         """
 
+        y_test = self.y_test.to_numpy()
         y_pred_prior = self.model_prior.predict(self.X_test_prior)
         y_pred_post = self.model_post.predict(self.X_test_post)
 
-        y_test_ = pd.DataFrame(self.y_test)
-        y_pred_prior = pd.DataFrame(y_pred_prior, columns=y_test.columns)
-        y_pred_post = pd.DataFrame(y_pred_post, columns=y_test.columns)
-
-        y_pred_prior['source'] = "prior"
-        y_pred_post['source'] = "post"
-        y_test['source'] = "test"
-
-        y_ = pd.concat([y_pred_prior, y_pred_post, y_test])
-        cols = [col for col in y_.columns if col != "source"]
-        y_ = pd.get_dummies(y_, columns=cols)
+        class_labels = np.unique(
+            np.concatenate([y_test, y_pred_prior, y_pred_post])
+        )
 
-        y_pred_prior = y_[y_.source == 'prior'].drop('source', axis=1).values
-        y_pred_post = y_[y_.source == 'post'].drop('source', axis=1).values
-        y_test = y_[y_.source == 'test'].drop('source', axis=1).values
+        if len(class_labels) == 2:
+            # for binary classification
+            # only take position 1, assuming position 1 is the true label
+            class_labels = class_labels[1:]
+
+        score_prior = self._classifier_scores(self.model_prior,
+                                              self.X_test_prior,
+                                              y_test,
+                                              y_pred_prior,
+                                              class_labels)
+        score_post = self._classifier_scores(self.model_post,
+                                             self.X_test_post,
+                                             y_test,
+                                             y_pred_post,
+                                             class_labels)
+
+        index = pd.MultiIndex.from_product(
+            [[str(label) for label in class_labels], ['Prior', 'Post']],
+            names=['Class', 'Data Type']
+        )
 
-        y_.drop('source', axis=1, inplace=True)
-        class_labels = y_.columns
+        # interleave the prior and post scores of each class
+        res = pd.DataFrame({
+            metric: [score for pair in zip(score_prior[metric],
+                                           score_post[metric])
+                     for score in pair]
+            for metric in score_prior
+            },
+            index=index
+        )
 
-        res = pd.DataFrame([])
+        self.ml_report = res
 
-        if (len(y_test[0]) == 2):
-            # for binary classification
-            # only take position 1, assuming position 1 is the true label
-            iters = [1]
-        else:
-            # for multiclass classification
-            iters = range(len(y_test[0]))
 
-        for i in iters:
+    def _classifier_scores(self, model, X_test, y_test, y_pred, class_labels):
+        """
+        Calculates the one vs rest accuracy, precision, recall, F1 score &
+        AUC of `model` for each of `class_labels`.
 
-            precision_prior = precision_score(y_test[:,i], y_pred_prior[:,i])
-            recall_prior = recall_score(y_test[:,i], y_pred_prior[:,i])
-            acc_prior = accuracy_score(y_test[:,i], y_pred_prior[:,i])
-            f1_prior = f1_score(y_test[:,i], y_pred_prior[:,i])
-            try:
-                auc_prior = roc_auc_score(y_test[:,i], y_pred_prior[:,i])
-            except ValueError:
-                auc_prior = "NA"
+        Returns a dictionary of metric name to an array of per class scores.
+        """
 
-            precision_post = precision_score(y_test[:,i], y_pred_post[:,i])
-            recall_post = recall_score(y_test[:,i], y_pred_post[:,i])
-            acc_post = accuracy_score(y_test[:,i], y_pred_post[:,i])
-            f1_post = f1_score(y_test[:,i], y_pred_post[:,i])
+        precision = precision_score(y_test, y_pred,
+                                    labels=class_labels, average=None)
+        recall = recall_score(y_test, y_pred,
+                              labels=class_labels, average=None)
+        f1 = f1_score(y_test, y_pred,
+                      labels=class_labels, average=None)
+
+        is_true = y_test[:, None] == class_labels
+        is_pred = y_pred[:, None] == class_labels
+        accuracy = np.mean(is_true == is_pred, axis=0)
+
+        # AUC from the predicted probability of each class, classes the
+        # model never saw in training have a probability of 0
+        proba = model.predict_proba(X_test)
+        classes = list(model.classes_)
+
+        auc = []
+        for i, label in enumerate(class_labels):
+            if label in classes:
+                proba_ = proba[:, classes.index(label)]
+            else:
+                proba_ = np.zeros(len(y_test))
             try:
-                auc_post = roc_auc_score(y_test[:,i], y_pred_post[:,i])
+                auc.append(roc_auc_score(is_true[:, i], proba_))
             except ValueError:
-                auc_post = "NA"
-
-            multiindex = [(str(class_labels[i]), 'Prior'),
-                         (str(class_labels[i]), 'Post')]
-
-            index = pd.MultiIndex.from_tuples(multiindex,
-                                              names=['Class', 'Data Type'])
-
-            score = pd.DataFrame({
-                'Accuracy': [acc_prior, acc_post],
-                'Precision': [precision_prior, precision_post],
-                'Recall': [recall_prior, recall_post],
-                'F1': [f1_prior, f1_post],
-                'AUC': [auc_prior, auc_post]
-                },
-                index=index
-            )
-
-            res = pd.concat([res, score])
-
-        self.ml_report = res
+                auc.append("NA")
+
+        return {
+            'Accuracy': accuracy,
+            'Precision': precision,
+            'Recall': recall,
+            'F1': f1,
+            'AUC': auc
+        }
@@ -16,6 +16,7 @@ setuptools.setup(
     license="MIT license",
     install_requires=[
         "category-encoders>=2.2.2",
+        "joblib>=0.14.0",
         "matplotlib>=3.3.0",
         "numpy>=1.19.0",
         "pandas==1.0.0",
@@ -23,5 +24,8 @@ setuptools.setup(
         "scipy>=1.5.2",
         "seaborn>=0.11.1"
     ],
+    extras_require={
+        "numba": ["numba>=0.50.0"]
+    },
     python_requires=">=3.6.0"
 )